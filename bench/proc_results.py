@@ -2,6 +2,7 @@
 
 import argparse
 import csv
+import statistics
 import sys
 from tabulate import tabulate
 
@@ -11,6 +12,42 @@ fmt = 'csv'
 # number of parameters of execution
 PARAMS_NUM = 1
 
+# measurements of pycobench (key=value columns) output as columns
+MEASURED_STATS = ['sys', 'wall', 'memory']
+
+
+###########################################
+def get_stat(stats_cols, key):
+    """get_stat(stats_cols, key) -> str
+
+    returns the value of the additional 'key=value' column of a row (None if
+    the row does not have it)
+"""
+    for col in stats_cols:
+        if col.startswith(key + '='):
+            return col[len(key) + 1:]
+    return None
+
+
+###########################################
+def is_final_pass(stats_cols):
+    """is_final_pass(stats_cols) -> bool
+
+    checks whether a timeout row comes from the last pass (in the timeout
+    escalation mode of pycobench, the pass is given by a 'pass=I/N' column)
+"""
+    pass_str = get_stat(stats_cols, 'pass')
+    if pass_str is None:
+        return True
+    cur_pass, num_passes = pass_str.split('/')
+    return cur_pass == num_passes
+
+
+###########################################
+def format_float(val):
+    """format_float(val) -> str"""
+    return '{:.6g}'.format(val)
+
 
 ###########################################
 def proc_res(fd, args):
@@ -25,10 +62,20 @@ def proc_res(fd, args):
 
     engines = list()
     engines_outs = dict()
+    engines_repeated = set()   # engines with repeated measurements
+    engines_stats = dict()     # engines -> measured stats they have
+    engines_version = dict()   # engines -> versions of their tools
     results = dict()
     for row in reader:
-        assert len(row) >= 1 + 1 + PARAMS_NUM  # status + engine name + params
         status, eng = row[0], row[1]
+        # the header of pycobench: meta;engine;key=value...
+        if status == 'meta':
+            version = get_stat(row[2:], 'version')
+            if version is not None:
+                engines_version[eng] = version
+            continue
+
+        assert len(row) >= 1 + 1 + PARAMS_NUM  # status + engine name + params
         params = tuple(row[2:(PARAMS_NUM+2)])
         row_tail = row[(PARAMS_NUM+2):]
         if params not in results:
@@ -36,9 +83,42 @@ def proc_res(fd, args):
         if eng not in engines:
             engines.append(eng)
             engines_outs[eng] = list()
+            engines_stats[eng] = list()
+
+        # additional key=value columns of pycobench
+        if status == 'finished':
+            stats_cols = row_tail[4:]
+        elif status == 'error':
+            stats_cols = row_tail[1:]
+        else:
+            stats_cols = row_tail
 
-        # we don't have some results twice
-        assert eng not in results[params]
+        # a timeout in an earlier pass is superseded by a later pass
+        if status == 'timeout' and not is_final_pass(stats_cols):
+            continue
+
+        # repeated measurements: any failed run of a task (a warmup run or a
+        # sample) marks the task as failed, finished warmup runs are not
+        # results, and further samples extend the first one (pycobench repeats
+        # only finished tasks, so a failure is the last run of the task)
+        samples = list()
+        stat_samples = {key: list() for key in MEASURED_STATS}
+        warmup = get_stat(stats_cols, 'warmup')
+        sample = get_stat(stats_cols, 'sample')
+        prev = results[params].get(eng)
+        if status == 'finished' and warmup is not None:
+            continue
+        if status == 'finished' and sample not in [None, '1']:
+            if prev in ["ERR", "TO", "MO"]:
+                continue
+            if type(prev) == dict:
+                samples = prev["samples"]
+                stat_samples = prev["stats"]
+
+        # the task file is append-only: a task that was run again (e.g., after
+        # a timeout when resuming) has its latest result at the end
+        if status in ['finished', 'error', 'timeout', 'memout']:
+            results[params].pop(eng, None)
 
         if status == 'finished':
             retcode, out, err, runtime = row_tail[0], row_tail[1], \
@@ -46,6 +126,17 @@ def proc_res(fd, args):
 
             eng_res = dict()
             eng_res["runtime"] = runtime
+            eng_res["samples"] = samples + [float(runtime)]
+            if len(eng_res["samples"]) > 1:
+                engines_repeated.add(eng)
+            eng_res["stats"] = dict()
+            for key in MEASURED_STATS:
+                val = get_stat(stats_cols, key)
+                eng_res["stats"][key] = stat_samples[key]
+                if val is not None:
+                    eng_res["stats"][key] = stat_samples[key] + [val]
+                    if key not in engines_stats[eng]:
+                        engines_stats[eng].append(key)
             eng_res["retcode"] = retcode
             eng_res["error"] = err
             eng_res["output"] = dict()
@@ -71,25 +162,53 @@ def proc_res(fd, args):
         if status == 'timeout':
             results[params][eng] = "TO"
 
+        if status == 'memout':
+            results[params][eng] = "MO"
+
     list_ptrns = list()
     for bench in results:
         all_engs = True
         ls = list(bench)
         for eng in engines:
+            if eng in engines_version:
+                ls.append(engines_version[eng])
             out_len = len(engines_outs[eng]) + 1    # +1 = time
+            if eng in engines_repeated:
+                out_len += 3    # min, spread, samples
+            out_len += len(engines_stats[eng])
             if eng in results[bench]:
                 bench_res = results[bench][eng]
-                if bench_res == "ERR":
+                if bench_res in ["ERR", "TO", "MO"]:
                     for i in range(out_len):
-                        ls.append("ERR")
-                elif bench_res == "TO":
-                    for i in range(out_len):
-                        ls.append("TO")
+                        ls.append(bench_res)
                 else:
                     assert type(bench_res) == dict
                     assert "output" in bench_res
 
-                    ls.append(bench_res["runtime"])
+                    samples = bench_res["samples"]
+                    if len(samples) == 1:
+                        ls.append(bench_res["runtime"])
+                    else:
+                        ls.append(format_float(statistics.median(samples)))
+                    if eng in engines_repeated:
+                        # the spread is the median absolute deviation
+                        median = statistics.median(samples)
+                        ls.append(format_float(min(samples)))
+                        ls.append(format_float(statistics.median(
+                            abs(x - median) for x in samples)))
+                        ls.append(len(samples))
+                    for key in MEASURED_STATS:
+                        if key not in engines_stats[eng]:
+                            continue
+                        # the median over samples of repeated measurements
+                        vals = bench_res["stats"][key]
+                        if len(vals) == 0:
+                            ls.append("MISSING")
+                        elif len(vals) == 1:
+                            ls.append(vals[0])
+                        else:
+                            ls.append(format_float(statistics.median(
+                                float(x) for x in vals)))
                     for out in engines_outs[eng]:
                         if out in bench_res["output"]:
                             ls.append(bench_res["output"][out])
@@ -119,7 +238,15 @@ def proc_res(fd, args):
 
     header += ['name']
     for eng in engines:
+        if eng in engines_version:
+            header += [eng + "-version"]
         header += [eng + "-runtime"]
+        if eng in engines_repeated:
+            header += [eng + "-runtime-min", eng + "-runtime-spread",
+                       eng + "-samples"]
+        for key in MEASURED_STATS:
+            if key in engines_stats[eng]:
+                header += [eng + "-" + key]
         for out in engines_outs[eng]:
             header += [eng + "-" + out]
 
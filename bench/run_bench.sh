@@ -15,6 +15,14 @@ show_help() {
 	echo "  -j N      How many processes to run in parallel (default=8)"
 	echo "  -m N      Memory limit of each process in GB (default=8)"
 	echo "  -s N      Timeout for each process in seconds (default=120)"
+	echo "  -l        Run longest tasks first (runtimes are taken from previous"
+	echo "            .tasks files of the same tool and benchmark)"
+	echo "  -c DIR    Cache results in DIR and reuse them in later runs"
+	echo "  -e LIST   Escalate timeouts: run all tasks with the comma-separated"
+	echo "            shorter timeouts in LIST first (e.g., 1,10) and only the"
+	echo "            tasks that timed out with the timeout given by -s"
+	echo "  -g N      Do not start new processes while less than N GB of memory"
+	echo "            is available (running processes are not affected)"
 	
 	echo "Note: positional arguments are treated as benchmark names and are not"
 	echo "expanded into groups. Provide multiple benchmark names to run them all."
@@ -28,7 +36,11 @@ tool="kofola"
 j_value="8"
 m_value="8"
 s_value="120"
-while getopts "ht:j:m:s:" option; do
+lpt=0
+cache_dir=""
+escalate=""
+min_free=""
+while getopts "ht:j:m:s:lc:e:g:" option; do
     case $option in
         h)
             show_help 
@@ -46,6 +58,18 @@ while getopts "ht:j:m:s:" option; do
         s)
             s_value=$OPTARG
             ;;
+        l)
+            lpt=1
+            ;;
+        c)
+            cache_dir=$OPTARG
+            ;;
+        e)
+            escalate=$OPTARG
+            ;;
+        g)
+            min_free=$OPTARG
+            ;;
         *)
             echo "Invalid option: -$OPTARG"
             show_help
@@ -76,7 +100,23 @@ for benchmark in "${benchmarks[@]}"; do
 	echo "Running benchmark $benchmark"
 	FILE_PREFIX="$benchmark-to${s_value}-$tool-$CUR_DATE"
 	TASKS_FILE="$FILE_PREFIX.tasks"
-	cat "$benchmark.input" | ./pycobench -c omega-compl.yaml -j $j_value -t $s_value --memout $m_value -m "$tool" -o "$TASKS_FILE"
+	sched_params=()
+	if [ -n "$cache_dir" ]; then
+		sched_params+=("--cache" "$cache_dir")
+	fi
+	if [ -n "$escalate" ]; then
+		sched_params+=("--escalate" "$escalate")
+	fi
+	if [ -n "$min_free" ]; then
+		sched_params+=("--min-free-memory" "$min_free")
+	fi
+	if [ "$lpt" -eq 1 ]; then
+		sched_params+=("--schedule" "lpt")
+		for hist_file in "$benchmark"-to*-"$tool"-*.tasks; do
+			[ -e "$hist_file" ] && sched_params+=("--history" "$hist_file")
+		done
+	fi
+	cat "$benchmark.input" | ./pycobench -c omega-compl.yaml -j $j_value -t $s_value --memout $m_value -m "$tool" "${sched_params[@]}" -o "$TASKS_FILE"
 	tasks_files+=("$TASKS_FILE")
 	echo "$TASKS_FILE" >> tasks_names.txt
 done
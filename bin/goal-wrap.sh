@@ -19,24 +19,28 @@ cp -r ${GOAL_DIR} ${GOAL_TMP_DIR}
 # ./util/ba2gff.py ${INPUT} > ${TMP} || exit $?
 TMP=${INPUT}
 
-TIME_TMP="$(mktemp)"
 set -o pipefail
 # out=$(time ${GOAL_TMP_DIR}/goal/gc complement ${params} ${TMP} ${TIME_TMP} | grep -i "<state sid" | wc -l)
 
 GOAL_TMP="$(mktemp)"
+TIME_TMP="$(mktemp)"
 #this was working
 #out=$(/usr/bin/time -p ${GOAL_TMP_DIR}/goal/gc complement ${params} ${TMP} 2>${TIME_TMP} | grep -i "<state sid" | wc -l)
 # /usr/bin/time -p ${GOAL_TMP_DIR}/goal/gc batch "load \$aut \$1; \$compl = complement --option \$3 \$aut; save -c hoaf \$compl \$2;" ${TMP} ${GOAL_TMP} "${params}" 2> ${TIME_TMP}
-/usr/bin/time -p ${GOAL_TMP_DIR}/goal/gc batch "load -c hoaf \$aut \$1; \$compl = complement --option \$3 \$aut; save -c hoaf \$compl \$2;" ${INPUT} ${GOAL_TMP} "${params}" 2> ${TIME_TMP}
+# pycobench measures the whole wrapper (including the copy of GOAL), the user
+# time of gc alone (by the time keyword of bash; the stderr of gc is kept) is
+# printed as Time: on stderr
+TIMEFORMAT="%U"
+{ time ${GOAL_TMP_DIR}/goal/gc batch "load -c hoaf \$aut \$1; \$compl = complement --option \$3 \$aut; save -c hoaf \$compl \$2;" ${INPUT} ${GOAL_TMP} "${params}" 2>&3 ; } 3>&2 2> ${TIME_TMP}
 ret=$?
+echo "Time: $(cat ${TIME_TMP})" >&2
+rm ${TIME_TMP}
 # rm ${TMP}
 rm -rf ${GOAL_TMP_DIR}
 
-./bin/autfilt --high --ba ${GOAL_TMP} | grep "States:" | sed "s/States/autfilt-States/"
-
-cat ${GOAL_TMP} | grep "States:"
-cat ${TIME_TMP} | grep "user" | sed "s/user/Time:/"
+# the complement is reduced (and its size extracted) by the post-processing
+# stage of pycobench (see ba-compl.yaml)
+cat ${GOAL_TMP}
 rm ${GOAL_TMP}
-rm ${TIME_TMP}
 
 exit ${ret}
@@ -14,41 +14,19 @@ shift
 # preserve argument boundaries and spacing
 params=("$@")
 
-# Remove any parameter that contains --high (kofola doesn't accept it)
-kofola_params=()
-has_high=0
-for p in "${params[@]}"; do
-    if [[ "$p" == *--high* ]]; then
-        has_high=1
-        # skip this parameter when invoking kofola
-        continue
-    fi
-    kofola_params+=("$p")
-done
-
+# the version of kofola is recorded by pycobench (see omega-compl.yaml)
 kofola_exe="${SCRIPT_DIR}/kofola/build/src/kofola"
-# capture the full version string (may contain spaces)
-kofola_version_string="$("${kofola_exe}" --version 2>/dev/null)"
-# extract the last whitespace-separated token (the git hash)
-kofola_git_hash=$(awk '{print $NF}' <<< "${kofola_version_string}")
-kofola_str=${kofola_git_hash:0:7}
 
 TMP=$(mktemp)
 
-# make sure pipeline failures are detected
-set -o pipefail
-
-if [ "$has_high" -eq 1 ]; then
-    "${kofola_exe}" "${kofola_params[@]}" "${INPUT}" | autfilt --high > "${TMP}"
-else
-    "${kofola_exe}" "${kofola_params[@]}" "${INPUT}" > "${TMP}"
-fi
+# reductions (autfilt --high) are run by pycobench as a separate
+# post-processing stage (see omega-compl.yaml)
+"${kofola_exe}" "${params[@]}" "${INPUT}" > "${TMP}"
 
 # capture return code
 ret=$?
 
-# prefix the States header with the short git hash and print the full output
-cat "${TMP}" | grep "^States:" | sed "s/^States/$kofola_str-states/"
+cat "${TMP}" | grep "^States:" | sed "s/^States/states/"
 
 rm -f "${TMP}"
 
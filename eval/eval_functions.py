@@ -55,18 +55,37 @@ def load_benches(benches, tools, timeout = 120):
         for tool in tools:
             if tool+"-states" not in df.keys():
                 df[tool+"-states"] = "TO"
+            # with repeated measurements, runtime is the median of the samples;
+            # a single measurement is its own minimum with no spread
+            if tool+"-runtime-min" not in df.keys():
+                df[tool+"-runtime-min"] = df[tool+"-runtime"]
+                df[tool+"-runtime-spread"] = "0"
+            # system time, wall-clock time (in seconds) and peak memory (in MiB)
+            # are not in results of old versions of pycobench
+            for stat in ["sys", "wall", "memory"]:
+                if tool+"-"+stat not in df.keys():
+                    df[tool+"-"+stat] = "MISSING"
+            # the version of the tool is in the header of the .tasks file
+            if tool+"-version" not in df.keys():
+                df[tool+"-version"] = "MISSING"
       
         df["benchmark"] = bench
         dfs[bench] = df
 
-    df_runtime_result = pd.concat(dfs, ignore_index=True)[["benchmark", "name"] + [f(tool) for tool in tools for f in (lambda x: x + "-states", lambda x: x + "-runtime")]]
+    df_runtime_result = pd.concat(dfs, ignore_index=True)[["benchmark", "name"] + [f(tool) for tool in tools for f in (lambda x: x + "-states", lambda x: x + "-runtime", lambda x: x + "-runtime-min", lambda x: x + "-runtime-spread", lambda x: x + "-sys", lambda x: x + "-wall", lambda x: x + "-memory", lambda x: x + "-version")]]
     
     for tool in tools:
         states_ser = pd.to_numeric(df_runtime_result[f"{tool}-states"], errors='coerce')
         mask_non_numeric = states_ser.isna()
         df_runtime_result.loc[mask_non_numeric, f"{tool}-runtime"] = float(timeout)
+        df_runtime_result.loc[mask_non_numeric, f"{tool}-runtime-min"] = float(timeout)
+        df_runtime_result.loc[mask_non_numeric, f"{tool}-runtime-spread"] = 0.0
         # runtime columns should be floats
-        df_runtime_result[f"{tool}-runtime"] = pd.to_numeric(df_runtime_result[f"{tool}-runtime"], errors='coerce').astype(float)
+        for col in ["runtime", "runtime-min", "runtime-spread"]:
+            df_runtime_result[f"{tool}-{col}"] = pd.to_numeric(df_runtime_result[f"{tool}-{col}"], errors='coerce').astype(float)
+        # measurements are NaN where unknown (timeouts, memouts, errors)
+        for col in ["sys", "wall", "memory"]:
+            df_runtime_result[f"{tool}-{col}"] = pd.to_numeric(df_runtime_result[f"{tool}-{col}"], errors='coerce').astype(float)
 
     df_all = df_runtime_result #.merge(df_stats)
     return df_all
@@ -417,8 +436,12 @@ def get_timeouts(df, tool):
     """Returns dataframe containing rows of df, where df[tool-result] is timeout, i.e., 'TO'"""
     return df[(df[tool+"-states"].str.strip() == 'TO')]
 
+def get_memouts(df, tool):
+    """Returns dataframe containing rows of df, where df[tool-result] is memout, i.e., 'MO'"""
+    return df[(df[tool+"-states"].str.strip() == 'MO')]
+
 def get_errors(df, tool):
-    """Returns dataframe containing rows of df, where df[tool-result] is error, i.e., 'ERR'"""
+    """Returns dataframe containing rows of df, where df[tool-result] is error, i.e., 'ERR' (memouts are not errors, see get_memouts)"""
     return df[(df[tool+"-states"].str.strip().isin(['ERR', 'MISSING']))]
 
 def simple_table(df, tools, benches, separately=False, stat_from_solved=True):
@@ -435,7 +458,7 @@ def simple_table(df, tools, benches, separately=False, stat_from_solved=True):
     result = ""
 
     def print_table_from_full_df(df):
-        header = ["tool", "✅", "❌", "states", "max-states", "states-avg", "states-med", "time", "time-avg", "time-med", "TO", "ERR"]
+        header = ["tool", "✅", "❌", "states", "max-states", "states-avg", "states-med", "time", "time-avg", "time-med", "TO", "MO", "ERR"]
         result = ""
         result += f"# of automata: {len(df)}\n"
         result += "----------------------------------------------------------------------------------------------------\n"
@@ -443,6 +466,7 @@ def simple_table(df, tools, benches, separately=False, stat_from_solved=True):
         for tool in tools:
             valid = len(get_solved(df, tool))
             to = len(get_timeouts(df, tool))
+            mo = len(get_memouts(df, tool))
             err = len(get_errors(df, tool))
             runtime_col = df[f"{tool}-runtime"]
             states_col = df[f"{tool}-states"]
@@ -457,7 +481,7 @@ def simple_table(df, tools, benches, separately=False, stat_from_solved=True):
             runtime_avg = runtime_col.mean()
             runtime_med = runtime_col.median()
             
-            table.append([tool, valid, to + err, states_total, states_max, states_avg, states_med, runtime_total, runtime_avg, runtime_med, to, err])
+            table.append([tool, valid, to + mo + err, states_total, states_max, states_avg, states_med, runtime_total, runtime_avg, runtime_med, to, mo, err])
         result += tab.tabulate(table, headers='firstrow', floatfmt=".2f") + "\n"
         result += "----------------------------------------------------------------------------------------------------\n\n"
         return result
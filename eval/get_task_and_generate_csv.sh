@@ -19,7 +19,9 @@ extract_tool_name() {
     echo "$tool_name"
 }
 
-# Extracts the tool version from the line containing substring ";version-states".
+# Extracts the tool version from the line containing substring ";version-states"
+# (written by older wrapper scripts; pycobench now records the version in the
+# header line "meta;tool_name;version=VERSION").
 get_tool_version() {
 	local line_with_version="$1"
 	line_with_version=${line_with_version%-states*}
@@ -44,17 +46,27 @@ process_tasks() {
 
 	local git_message=""
 
+	local version=""
+	local line_with_meta=$(grep -m 1 -- "^meta;$tool_name;version=" "$path_to_file")
 	local line_with_version=$(grep -m 1 -- "-states" "$path_to_file")
-	if [ -z "$line_with_version" ]; then
+	if [ -n "$line_with_meta" ]; then
+		version=${line_with_meta#*;version=}
+		version=${version%%;*}    # e.g., followed by ;post_version=VERSION
+	elif [ -n "$line_with_version" ]; then
+		version=$(get_tool_version "$line_with_version")
+		if [[ "$(uname)" == "Darwin" ]]; then
+			sed -i '' "s/$version-states/states/g" $path_to_file
+		else
+			sed -i "s/$version-states/states/g" $path_to_file
+		fi
+	fi
+
+	if [ -z "$version" ]; then
 		git_message="$tool_name on $benchmark_name"
 	else
-		local version=$(get_tool_version "$line_with_version")
-		
 		if [[ "$(uname)" == "Darwin" ]]; then
-			sed -i '' "s/$version-states/states/g" $path_to_file
 			sed -i '' "s/$tool_name;/$tool_name-$version;/g" $path_to_file
 		else
-			sed -i "s/$version-states/states/g" $path_to_file
 			sed -i "s/$tool_name;/$tool_name-$version;/g" $path_to_file
 		fi
 		git_message="$tool_name-$version on $benchmark_name"
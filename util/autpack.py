@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# A script for packing a corpus of automata into a single archive (see
+# writeArchive() in buchi_conv_common), unpacking it, and listing its members.
+# Parameters of pycobench can refer to members of an archive as
+# ARCHIVE::MEMBER (see "list --params").
+
+import argparse
+import os
+import buchi_conv_common as BA
+from bulk_conv import list_sources
+
+# the separator of an archive and its member in parameters of pycobench
+MEMBER_SEPARATOR = "::"
+
+
+###########################################
+def read_members(base, names):
+    """read_members(base, names) -> generator of (str, bytes)
+
+Lazily reads the files 'names' (relative to 'base').
+"""
+    for name in names:
+        with open(os.path.join(base, name), 'rb') as fd:
+            yield (name, fd.read())
+
+
+###########################################
+def pack(args):
+    """pack(args) -> None"""
+    base, names = list_sources(args.source, args.suffix)
+    cnt = BA.writeArchive(args.archive, read_members(base, names))
+    print("packed {} automata into {}".format(cnt, args.archive))
+
+
+###########################################
+def unpack(args):
+    """unpack(args) -> None
+
+Members whose names are not relative paths inside the output directory are
+rejected (see check_member_name() in buchi_conv_common) before anything is
+written.
+"""
+    output = os.path.realpath(args.output)
+    with BA.AutomataArchive(args.archive) as archive:
+        names = args.members if args.members else archive.names()
+        for name in names:
+            BA.check_member_name(name)
+        for name in names:
+            path = os.path.join(output, name)
+            # e.g., a symbolic link to a directory elsewhere
+            if os.path.commonpath([output, os.path.realpath(path)]) != output:
+                raise Exception("Member {} is outside of {}".format(
+                                name, args.output))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as fd:
+                fd.write(archive.read(name))
+    print("unpacked {} automata into {}".format(len(names), args.output))
+
+
+###########################################
+def list_members(args):
+    """list_members(args) -> None"""
+    with BA.AutomataArchive(args.archive) as archive:
+        for name in archive:
+            if args.params:
+                print(args.archive + MEMBER_SEPARATOR + name)
+            elif args.long:
+                print("{:10} {}".format(archive.size(name), name))
+            else:
+                print(name)
+
+
+###########################################
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+                description="packs automata into an archive, unpacks and "
+                            "lists it")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    pack_parser = subparsers.add_parser("pack", help="create an archive")
+    pack_parser.add_argument("archive", help="the archive to create")
+    pack_parser.add_argument("source",
+                             help="a directory with automata (searched "
+                                  "recursively) or an .input file with a "
+                                  "list of automata")
+    pack_parser.add_argument("-s", "--suffix", metavar="SUFFIX", default="",
+                             help="pack only files with the suffix (when "
+                                  "packing a directory)")
+    pack_parser.set_defaults(func=pack)
+
+    unpack_parser = subparsers.add_parser("unpack",
+                                          help="extract an archive")
+    unpack_parser.add_argument("archive", help="the archive")
+    unpack_parser.add_argument("output", help="the output directory")
+    unpack_parser.add_argument("members", nargs="*",
+                               help="the members to extract (default: all)")
+    unpack_parser.set_defaults(func=unpack)
+
+    list_parser = subparsers.add_parser("list",
+                                        help="list members of an archive")
+    list_parser.add_argument("archive", help="the archive")
+    list_parser.add_argument("-l", "--long", action="store_true",
+                             help="print also sizes of members")
+    list_parser.add_argument("--params", action="store_true",
+                             help="print members as parameters of pycobench "
+                                  "(ARCHIVE" + MEMBER_SEPARATOR + "MEMBER), "
+                                  "i.e., an .input file")
+    list_parser.set_defaults(func=list_members)
+
+    args = parser.parse_args()
+    args.func(args)
@@ -16,7 +16,7 @@ if __name__ == '__main__':
         print("Invalid number of arguments: either 0 or 1 required")
         sys.exit(1)
 
-    aut = BA.parseBA(fd)
+    aut = BA.parseBA(fd, compact=True)
     res = BA.aut2GFF(aut)
 
     print(res, end="")
@@ -26,7 +26,5 @@ if __name__ == '__main__':
 
     args = parser.parse_args()
 
-    aut = BA.parseBA(args.file)
-    res = BA.aut2HOA(aut, ENCODING_CHOICES[args.encoding])
-
-    print(res, end="")
+    aut = BA.parseBA(args.file, compact=True)
+    BA.writeHOA(aut, sys.stdout, ENCODING_CHOICES[args.encoding])
@@ -1,141 +1,715 @@
+import bisect
+import functools
+import io
+import mmap
+import os
 import re
+import struct
+from array import array
+
+# the number of lines writeHOA() writes at once
+HOA_CHUNK_LINES = 4096
+
+# tokens of the HOA format: comments, strings, labels ("[...]") and sets of
+# acceptance marks ("{...}") as a whole, header names ("name:"), identifiers,
+# aliases, numbers, markers of sections ("--BODY--") and other characters; the
+# whitespace before a token is skipped as a part of its match (which is faster
+# than failing to match at every whitespace character)
+HOA_TOKEN_RE = re.compile(r'\s*(/\*.*?\*/|"(?:[^"\\]|\\.)*"|\[[^\]]*\]|\{[^}]*\}|'
+                          r'[A-Za-z_][\w-]*:?|@[\w-]+|\d+|--[A-Z]+--|\S)',
+                          re.DOTALL)
+
+# tokens of labels and acceptance conditions
+HOA_EXPR_TOKEN_RE = re.compile(r'\d+|@[\w-]+|[A-Za-z_][\w-]*|\S')
+
+# a literal of a label (see hoa_label_to_symbol())
+HOA_LITERAL_RE = re.compile(r'(?P<neg>!)?(?P<ap>\d+)')
+
+# the end of the input (in lists of tokens)
+HOA_EOF = "--EOF--"
+
+# lines of Rabit's BA format (stripped): a final state and a transition
+BA_STATE_RE = re.compile(r'[^-,>]+')
+BA_TRANS_RE = re.compile(r'(?P<symb>[^-,>]+),(?P<src>[^-,>]+)->(?P<tgt>[^-,>]+)')
+
+# archives of automata (see writeArchive()): the magic number at the beginning
+# and at the end, an entry of the index (offset, length and length of the name
+# followed by the name) and the trailer (offset of the index and the number of
+# members followed by the magic number)
+ARCHIVE_MAGIC = b"AUTPACK1"
+ARCHIVE_ENTRY = struct.Struct("<QQI")
+ARCHIVE_TRAILER = struct.Struct("<QQ")
 
 
 ###########################################
-def parseBA(fd):
-    """parseBA(fd) -> dict()
+class Automaton:
+    """Automaton: a compact representation of an automaton.
+
+Names of states and symbols are interned: they are numbered in the order of
+their first occurrence and kept only once (in 'state_names' and
+'symbol_names'; 'state_ids' and 'symbol_ids' map them back to the numbers).
+Names of states are strings, a symbol might also be None (a transition of a
+HOA automaton over no positive atomic proposition).  Initial and final states
+are kept in typed arrays of numbers of states, the transitions in typed arrays
+of numbers of their sources, symbols and targets (in the order they were
+added).  The transitions are also indexed by their source states in the CSR
+(compressed sparse row) form: the transitions leaving the state 'q' (with
+their symbols and targets) are those with the indices
+'out_trans[out_start[q]:out_start[q+1]]' (see out_transitions()).  The same
+rows with the transitions sorted by their symbols ('symb_trans', with the
+symbols in 'symb_keys') are searched by successors() for a symbol.  The
+indices are built when they are needed.
+"""
+    def __init__(self):
+        self.state_names = []
+        self.state_ids = dict()
+        self.symbol_names = []
+        self.symbol_ids = dict()
+        self.initial = array('i')
+        self.final = array('i')
+        self.trans_src = array('i')
+        self.trans_symb = array('i')
+        self.trans_tgt = array('i')
+        self.out_start = None    # the index, see out_transitions()
+        self.out_trans = None
+        self.symb_trans = None   # see build_symbol_index()
+        self.symb_keys = None
+        self.final_flags = None
+
+        # further properties of automata in the HOA format (see iterHOA())
+        self.header = dict()    # header item -> list of its values (tokens)
+        self.aps = []           # names of atomic propositions
+        self.acc_sets = 1       # the number of acceptance sets
+        self.acceptance = "Inf(0)"   # the acceptance condition
+        self.start = []         # initial states as tuples (conjunctions)
+        self.state_marks = dict()    # state -> tuple of its acceptance sets
+        self.trans_marks = dict()    # transition -> tuple of acceptance sets
+        self.univ_targets = dict()   # transition -> tuple of all its targets
+
+    def add_state(self, name):
+        """add_state(name) -> int
+
+Returns the number of the state 'name' (adding it if it is new).
+"""
+        name = str(name)
+        state = self.state_ids.get(name)
+        if state is None:
+            state = len(self.state_names)
+            self.state_ids[name] = state
+            self.state_names.append(name)
+            self.out_start = None
+        return state
+
+    def add_symbol(self, name):
+        """add_symbol(name) -> int
+
+Returns the number of the symbol 'name' (adding it if it is new).
+"""
+        symb = self.symbol_ids.get(name)
+        if symb is None:
+            symb = len(self.symbol_names)
+            self.symbol_ids[name] = symb
+            self.symbol_names.append(name)
+        return symb
+
+    def add_initial(self, name):
+        """add_initial(name) -> None"""
+        self.initial.append(self.add_state(name))
+
+    def add_final(self, name):
+        """add_final(name) -> None"""
+        self.final.append(self.add_state(name))
+        self.out_start = None
+
+    def add_transition(self, src, symb, tgt):
+        """add_transition(src, symb, tgt) -> None
+
+Adds a transition given by names of its source state, symbol and target
+state.
+"""
+        self.trans_src.append(self.add_state(src))
+        self.trans_symb.append(self.add_symbol(symb))
+        self.trans_tgt.append(self.add_state(tgt))
+        self.out_start = None
 
-Parses Rabit's BA format into a simple dictionary.
+    def num_states(self):
+        """num_states() -> int"""
+        return len(self.state_names)
+
+    def num_transitions(self):
+        """num_transitions() -> int"""
+        return len(self.trans_src)
+
+    def build_index(self):
+        """build_index() -> None
+
+Builds the index of transitions by their source states (a counting sort,
+which keeps the transitions leaving one state in the order they were added)
+and the flags of final states.
 """
-    aut = dict()
-    first_line = fd.readline().strip()
-    aut["initial"] = [first_line]
-    aut["transitions"] = []
-    aut["final"] = []
+        num_states = len(self.state_names)
+        start = array('i', bytes(4 * (num_states + 1)))
+        for src in self.trans_src:
+            start[src + 1] += 1
+        for state in range(num_states):
+            start[state + 1] += start[state]
+
+        pos = array('i', start)
+        trans = array('i', bytes(4 * len(self.trans_src)))
+        for (i, src) in enumerate(self.trans_src):
+            trans[pos[src]] = i
+            pos[src] += 1
+
+        flags = bytearray(num_states)
+        for state in self.final:
+            flags[state] = 1
+
+        self.out_start = start
+        self.out_trans = trans
+        self.final_flags = flags
+        self.symb_trans = None
+        self.symb_keys = None
+
+    def build_symbol_index(self):
+        """build_symbol_index() -> None
+
+Builds the rows of the index of transitions by their source states (see
+build_index()) with the transitions of every state sorted by their symbols
+(and then in the order they were added).
+"""
+        if self.out_start is None:
+            self.build_index()
+        order = sorted(range(len(self.trans_src)),
+                       key=self.trans_symb.__getitem__)
+        order.sort(key=self.trans_src.__getitem__)   # stable
+        self.symb_trans = array('i', order)
+        self.symb_keys = array('i', map(self.trans_symb.__getitem__, order))
+
+    def out_transitions(self, state):
+        """out_transitions(state) -> array
+
+Returns the indices of the transitions leaving the state number 'state'.
+"""
+        if self.out_start is None:
+            self.build_index()
+        return self.out_trans[self.out_start[state]:self.out_start[state + 1]]
 
-    while True:
-        line = fd.readline()
-        if not line:
-            return aut
+    def successors(self, state, symb=None):
+        """successors(state, symb) -> list
+
+Returns the numbers of the targets of transitions leaving the state number
+'state' (over the symbol number 'symb' if it is given).
+"""
+        if symb is None:
+            return [self.trans_tgt[i] for i in self.out_transitions(state)]
+        if self.out_start is None or self.symb_trans is None:
+            self.build_symbol_index()
+        end = self.out_start[state + 1]
+        low = bisect.bisect_left(self.symb_keys, symb, self.out_start[state],
+                                 end)
+        high = bisect.bisect_right(self.symb_keys, symb, low, end)
+        return [self.trans_tgt[i] for i in self.symb_trans[low:high]]
+
+    def is_final(self, state):
+        """is_final(state) -> bool"""
+        if self.out_start is None:
+            self.build_index()
+        return self.final_flags[state] == 1
+
+    def transitions(self):
+        """transitions() -> iterator of (str, str, str)
+
+Returns an iterator over the transitions (triples of names of the source, the
+symbol and the target) in the order they were added.
+"""
+        states, symbols = self.state_names, self.symbol_names
+        return zip(map(states.__getitem__, self.trans_src),
+                   map(symbols.__getitem__, self.trans_symb),
+                   map(states.__getitem__, self.trans_tgt))
 
+    @classmethod
+    def from_dict(cls, aut):
+        """from_dict(aut) -> Automaton
+
+Creates an automaton from the dictionary form (see parseBA()).
+"""
+        res = cls()
+        for st in aut["initial"]:
+            res.add_initial(st)
+        for (src, symb, tgt) in aut["transitions"]:
+            res.add_transition(src, symb, tgt)
+        for st in aut["final"]:
+            res.add_final(st)
+        return res
+
+    def to_dict(self):
+        """to_dict() -> dict()
+
+Converts the automaton into the dictionary form (see parseBA()).
+"""
+        aut = dict()
+        aut["initial"] = [self.state_names[st] for st in self.initial]
+        aut["transitions"] = list(self.transitions())
+        aut["final"] = [self.state_names[st] for st in self.final]
+        return aut
+
+
+###########################################
+def as_automaton(aut):
+    """as_automaton(aut) -> Automaton
+
+Returns 'aut' given either as an Automaton or in the dictionary form as an
+Automaton.
+"""
+    if isinstance(aut, Automaton):
+        return aut
+    return Automaton.from_dict(aut)
+
+
+###########################################
+def parseBA(fd, compact=False):
+    """parseBA(fd, compact) -> dict() or Automaton
+
+Parses Rabit's BA format into a simple dictionary (with the keys "initial",
+"transitions" and "final"; transitions are triples (src, symb, tgt)) or, if
+'compact' is set, into an Automaton (see parse_ba_lines()).
+"""
+    first_line = fd.readline().strip()
+    if compact:
+        return parse_ba_lines(fd, first_line)
+
+    transitions = []
+    final = []
+    for line in fd:
         line = line.strip()
         if line == "":
             continue
 
-        match = re.match(r'^(?P<state>[^-,>]+)$', line)
+        match = BA_TRANS_RE.fullmatch(line)
         if match:
-            aut["final"].append(match.group("state"))
+            transitions.append(match.group("src", "symb", "tgt"))
+        elif BA_STATE_RE.fullmatch(line):
+            final.append(line)
+        else:
+            raise Exception("Invalid format: " + line)
+
+    return {"initial": [first_line], "transitions": transitions,
+            "final": final}
+
+
+###########################################
+def parse_ba_lines(fd, first_line):
+    """parse_ba_lines(fd, first_line) -> Automaton
+
+Parses the lines of Rabit's BA format following the first one ('first_line',
+the initial state) into an Automaton (with states numbered in the order of
+their first occurrence in the file).
+"""
+    aut = Automaton()
+    aut.add_initial(first_line)
+    state_ids = aut.state_ids
+    symbol_ids = aut.symbol_ids
+    add_src = aut.trans_src.append
+    add_symb = aut.trans_symb.append
+    add_tgt = aut.trans_tgt.append
+    for line in fd:
+        line = line.strip()
+        if line == "":
             continue
 
-        match = re.match(r'^(?P<symb>[^-,>]+),(?P<src>[^-,>]+)->(?P<tgt>[^-,>]+)$',
-                         line)
+        match = BA_TRANS_RE.fullmatch(line)
         if match:
-            symb = match.group("symb")
-            src = match.group("src")
-            tgt = match.group("tgt")
-            aut["transitions"].append((src, symb, tgt))
-            continue
+            symb, src, tgt = match.groups()
+            num = state_ids.get(src)
+            add_src(aut.add_state(src) if num is None else num)
+            num = symbol_ids.get(symb)
+            add_symb(aut.add_symbol(symb) if num is None else num)
+            num = state_ids.get(tgt)
+            add_tgt(aut.add_state(tgt) if num is None else num)
+        elif BA_STATE_RE.fullmatch(line):
+            aut.add_final(line)
+        else:
+            raise Exception("Invalid format: " + line)
+
+    aut.out_start = None
+    return aut
 
-        raise Exception("Invalid format: " + line)
+
+###########################################
+def join_hoa_expr(tokens):
+    """join_hoa_expr(tokens) -> string
+
+Joins tokens of a label or an acceptance condition into its text (binary
+operators are surrounded by spaces).
+"""
+    # "&" and "|" are never a part of a longer token
+    return "".join(tokens).replace("&", " & ").replace("|", " | ")
 
 
 ###########################################
-def parseHOA(fd):
-    """parseHOA(fd) -> dict()
+def expand_hoa_label(text, aliases):
+    """expand_hoa_label(text, aliases) -> list
 
-Parses Hanoi Omega Automata format into a simple dictionary.
-(Supports only a subset focused on state-based acceptance Buchi automata.)
+Splits a label (or the body of an alias) into tokens and expands aliases in it
+('aliases' maps names of aliases to lists of tokens).
 """
-    aut = dict()
-    aut["initial"] = []
-    aut["transitions"] = []
-    aut["final"] = []
+    res = []
+    for tok in HOA_EXPR_TOKEN_RE.findall(text):
+        if tok[0] == "@":
+            if tok not in aliases:
+                raise Exception("Undefined alias: {}".format(tok))
+            body = aliases[tok]
+            if "&" in body or "|" in body:
+                res += ["("] + body + [")"]
+            else:
+                res += body
+        else:
+            res.append(tok)
+    return res
 
-    aps = dict()   # atomic propositions
 
-    # reading header
+###########################################
+def implicit_hoa_label(num, aps):
+    """implicit_hoa_label(num, aps) -> string
+
+Returns the implicit label of the 'num'-th edge of a state of an automaton with
+'aps' atomic propositions (the valuation with the i-th proposition given by
+the i-th least significant bit of 'num').
+"""
+    if num >= 2 ** aps:
+        raise Exception("Too many edges with implicit labels")
+    if aps == 0:
+        return "t"
+    return " & ".join(("" if num >> i & 1 else "!") + str(i)
+                      for i in range(aps))
+
+
+###########################################
+def parse_hoa_header(aut, toks, pos):
+    """parse_hoa_header(aut, toks, pos) -> (int, dict())
+
+Parses the header of a HOA automaton from the list of tokens 'toks' starting at
+the position 'pos' (at "HOA:") into 'aut'.  Returns the position
+following "--BODY--" and the aliases.
+"""
+    aliases = dict()
     while True:
-        line = fd.readline()
-        if not line: # no body
+        key = toks[pos]
+        if key == "--BODY--":
+            return (pos + 1, aliases)
+        if key == HOA_EOF or key == "--END--":
             raise Exception("Missing body!")
-        line = line.strip()
-        if line == "":
-            continue
-        if line == "--BODY--":
-            break
-        match = re.match(r'^(?P<key>[^:]+):\s*(?P<value>.*)$', line)
-        if not match:
-            raise Exception("Invalid header format: {}".format(line))
-
-        # input sanity checks
-        if match['key'] == "acc-name":
-            if (match['value'] != "Buchi"):
-                raise Exception("Not Buchi acceptance: {}".format(match['value']))
-        if match['key'] == "Acceptance":
-            if (match['value'] != "1 Inf(0)"):
-                raise Exception("Expected acceptance: \"1 Inf(0)\" Received: \"{}\"".format(match['value']))
-
-        # start state
-        if match['key'] == "Start":
-            aut["initial"] = [match['value']]
-
-        # atomic propositions
-        if match['key'] == "AP":
-            ap_ls = match['value'].split()
-            aps_num = int(ap_ls[0])
-            ap_ls = ap_ls[1:]
-            cnt = 0
-            for ap in ap_ls:   # mam APs to numbers
-                aps[cnt] = ap.strip("\"")
-                cnt += 1
-            if cnt != aps_num:
-                raise Exception("Invalid number of atomic propositions (does not match the declared number: {}".format(line))
-
-    # reading body
-    state = None
+        if key[-1] != ":" or key[0] in "\"[{":
+            raise Exception("Invalid header format: {}".format(key))
+        pos += 1
+        first = pos
+        tok = toks[pos]
+        while tok[-1] != ":" or tok[0] in "\"[{":
+            if tok in ("--BODY--", "--END--", HOA_EOF):
+                break
+            pos += 1
+            tok = toks[pos]
+        values = toks[first:pos]
+        key = key[:-1]
+        aut.header.setdefault(key, []).append(values)
+
+        if key == "Start":
+            conj = tuple(aut.add_state(st) for st in values if st != "&")
+            aut.start.append(conj)
+            for st in conj:
+                aut.initial.append(st)
+        elif key == "AP":
+            aut.aps = [ap[1:-1] for ap in values[1:]]
+            if len(aut.aps) != int(values[0]):
+                raise Exception("Invalid number of atomic propositions (does "
+                                "not match the declared number: {}".format(
+                                " ".join(values)))
+        elif key == "Alias":
+            aliases[values[0]] = expand_hoa_label(" ".join(values[1:]),
+                                                  aliases)
+        elif key == "Acceptance":
+            aut.acc_sets = int(values[0])
+            aut.acceptance = join_hoa_expr(values[1:])
+
+
+###########################################
+@functools.lru_cache(maxsize=65536)
+def normalize_hoa_label(text):
+    """normalize_hoa_label(text) -> string
+
+Returns the text of a label without aliases in the normal form (see
+join_hoa_expr()); labels repeat a lot across automata, hence the cache.
+"""
+    return join_hoa_expr(HOA_EXPR_TOKEN_RE.findall(text))
+
+
+###########################################
+def parse_hoa_body(aut, toks, pos, aliases):
+    """parse_hoa_body(aut, toks, pos, aliases) -> int
+
+Parses the body of a HOA automaton from the list of tokens 'toks' starting at
+the position 'pos' (just after "--BODY--") into 'aut'.  Returns the position
+following "--END--" (or -1 if the automaton is aborted by "--ABORT--").
+"""
+    state_ids = aut.state_ids
+    add_name = aut.state_names.append
+    add_src = aut.trans_src.append
+    add_symb = aut.trans_symb.append
+    add_tgt = aut.trans_tgt.append
+    labels = dict()     # label (token) -> symbol
+    mark_sets = dict()  # set of acceptance marks (token) -> tuple
+
+    def label_symbol(tok):
+        if aliases:
+            label = join_hoa_expr(expand_hoa_label(tok[1:-1], aliases))
+        else:
+            label = normalize_hoa_label(tok[1:-1])
+        symb = labels[tok] = aut.add_symbol(label)
+        return symb
+
+    buchi = aut.acc_sets == 1 and aut.acceptance == "Inf(0)"
+    src = None
+    state_symb = None   # the symbol of the label of the state
+    edge = 0            # the number of the edge of the state
     while True:
-        line = fd.readline()
-        if not line: # end of input
+        tok = toks[pos]
+
+        # an edge: [label] target[&target...] [{marks}]
+        if tok[0] == "[" or tok.isdigit():
+            if src is None:   # first state not declared
+                raise Exception("Invalid beginning of the body: {}".format(
+                                tok))
+            if tok[0] == "[":
+                symb = labels.get(tok)
+                if symb is None:
+                    symb = label_symbol(tok)
+                pos += 1
+                tok = toks[pos]
+            elif state_symb is not None:
+                symb = state_symb
+            else:
+                symb = aut.add_symbol(implicit_hoa_label(edge, len(aut.aps)))
+
+            tgt = state_ids.get(tok)
+            if tgt is None:   # a new state (see Automaton.add_state())
+                if not tok.isdigit():
+                    raise Exception("Invalid transition: {}".format(tok))
+                tgt = state_ids[tok] = len(state_ids)
+                add_name(tok)
+            pos += 1
+            tok = toks[pos]
+            if tok[0] in "&{":   # (rare) branching or marks follow
+                if tok == "&":   # universal branching
+                    targets = [tgt]
+                    while toks[pos] == "&":
+                        targets.append(aut.add_state(toks[pos + 1]))
+                        pos += 2
+                    aut.univ_targets[len(aut.trans_src)] = tuple(targets)
+                    tok = toks[pos]
+                if tok[0] == "{":
+                    marks = mark_sets.get(tok)
+                    if marks is None:
+                        marks = mark_sets[tok] = \
+                            tuple(map(int, tok[1:-1].split()))
+                    aut.trans_marks[len(aut.trans_src)] = marks
+                    pos += 1
+            add_src(src)
+            add_symb(symb)
+            add_tgt(tgt)
+            edge += 1
+            continue
+
+        if tok == "State:":
+            tok = toks[pos + 1]
+            state_symb = None
+            if tok[0] == "[":
+                state_symb = labels.get(tok)
+                if state_symb is None:
+                    state_symb = label_symbol(tok)
+                pos += 1
+                tok = toks[pos + 1]
+            if not tok.isdigit():
+                raise Exception("Invalid state: {}".format(tok))
+            src = state_ids.get(tok)
+            if src is None:
+                src = aut.add_state(tok)
+            pos += 2
+            if toks[pos][0] == "\"":   # the name of the state
+                pos += 1
+            if toks[pos][0] == "{":
+                marks = mark_sets.get(toks[pos])
+                if marks is None:
+                    marks = mark_sets[toks[pos]] = \
+                        tuple(map(int, toks[pos][1:-1].split()))
+                aut.state_marks[src] = marks
+                if buchi and 0 in marks:
+                    aut.final.append(src)
+                pos += 1
+            edge = 0
+        elif tok == "--END--":
+            return pos + 1
+        elif tok == "--ABORT--":
+            return -1
+        elif tok == HOA_EOF:
             raise Exception("Unexpected end of file")
-        line = line.strip()
-        if line == "":
+        else:
+            raise Exception("Invalid transition: {}".format(tok))
+
+
+###########################################
+def parse_hoa_tokens(toks, pos):
+    """parse_hoa_tokens(toks, pos) -> (Automaton, int)
+
+Parses one automaton from the list of tokens 'toks' (terminated by HOA_EOF)
+starting at the position 'pos'.  Returns the automaton (None if it was
+aborted) and the position following it.
+"""
+    if toks[pos] != "HOA:":
+        raise Exception("Invalid beginning of an automaton: {}".format(
+                        toks[pos]))
+    aut = Automaton()
+    aut.acc_sets = 0
+    aut.acceptance = "t"
+    pos, aliases = parse_hoa_header(aut, toks, pos)
+    declared = aut.header.get("States")
+    end = parse_hoa_body(aut, toks, pos, aliases)
+    if end < 0:
+        aborted = toks.index("--ABORT--", pos)
+        return (None, aborted + 1)
+
+    # states without edges that are only declared
+    if declared:
+        state_ids = aut.state_ids
+        for name in map(str, range(int(declared[-1][0]))):
+            if name not in state_ids:
+                aut.add_state(name)
+    return (aut, end)
+
+
+###########################################
+def tokenize_hoa(text):
+    """tokenize_hoa(text) -> list
+
+Splits a text in the HOA format into tokens (see HOA_TOKEN_RE), dropping
+comments.
+"""
+    toks = HOA_TOKEN_RE.findall(text)
+    if "/*" in text:
+        toks = [tok for tok in toks if not tok.startswith("/*")]
+    return toks
+
+
+###########################################
+def iterHOA(fd):
+    """iterHOA(fd) -> generator of Automaton
+
+Parses a stream of automata in the Hanoi Omega Automata format from the file
+object 'fd' (one automaton is read at a time).  Supported are labels on
+states and edges (also spanning several lines), implicit labels, aliases,
+universal branching (conjunctions of states in "Start:" and in targets of
+edges) and arbitrary (Emerson-Lei) acceptance conditions given by acceptance
+sets of states or transitions.  Aborted automata ("--ABORT--") are skipped.
+
+States of the automata are named by their numbers in the HOA format.  The
+symbols are the labels (with aliases expanded, e.g., "0 & !1"); see the
+attributes of Automaton for the other parts of an automaton.  For Buchi
+automata (the acceptance "Inf(0)" with one set), states in the acceptance set
+are also the final states.
+"""
+    toks = []
+    buf = []
+    for line in fd:
+        buf.append(line)
+        if "--END--" not in line and "--ABORT--" not in line:
             continue
-        if line == "--END--":
-            break
-
-        match = re.match(r'^State:\s*(?P<state>\d+)\s*(?P<final>.+)?$', line)
-        if not match:
-            if state is None:   # first state not declared
-                raise Exception("Invalid beginning of the body: {}".format(line))
-
-            trans_match = re.match(r'\[(?P<aps>[^\]].*)\]\s*(?P<dst>\d+)$', line)
-            if not trans_match:
-                raise Exception("Invalid transition: {}".format(line))
-
-            dst = trans_match['dst']
-
-            str_aps = trans_match['aps']
-            ls_str_aps = str_aps.split("&")
-            symb = None
-            for one_ap in ls_str_aps:
-                one_ap = one_ap.strip()
-                ap_match = re.match(r'^(?P<neg>!)?\s*(?P<ap>\d+)$', one_ap)
-                if not ap_match:
-                    raise Exception("Invalid AP: {}".format(line))
-                if not ap_match['neg']: # positive AP
-                    if symb is not None:   # if other AP was positive
-                        raise Exception("More than one positive AP: {}".format(line))
-
-                    symb_num = int(ap_match['ap'])
-                    symb = aps[symb_num]
-
-            aut['transitions'].append((state, symb, dst))
-
-        # continue in the transition of the current state
-        else:    # if new state declared
-            state = int(match['state'])
-            if match['final']:
-                aut['final'].append(str(state))
+        new = tokenize_hoa("".join(buf))
+        buf = []
+        # the last end of an automaton
+        last = len(new) - 1
+        while last >= 0 and new[last] not in ("--END--", "--ABORT--"):
+            last -= 1
+        toks += new
+        if last < 0:
+            continue   # the marker was in a comment or a string
+        last += len(toks) - len(new)
+
+        toks.append(HOA_EOF)
+        pos = 0
+        while pos <= last:
+            aut, pos = parse_hoa_tokens(toks, pos)
+            if aut is not None:
+                yield aut
+        toks = toks[pos:-1]
+
+    toks += tokenize_hoa("".join(buf))
+    if toks:
+        toks.append(HOA_EOF)
+        parse_hoa_tokens(toks, 0)   # raises an exception
+
+
+###########################################
+@functools.lru_cache(maxsize=65536)
+def hoa_label_to_symbol(label, aps):
+    """hoa_label_to_symbol(label, aps) -> str
+
+Converts a label that is a conjunction of literals with at most one positive
+atomic proposition into the name of the proposition (None if there is no
+positive one); 'aps' is the tuple of names of atomic propositions.  Labels
+repeat a lot across automata, hence the cache.
+"""
+    symb = None
+    for lit in label.split(" & "):
+        ap_match = HOA_LITERAL_RE.fullmatch(lit)
+        if not ap_match:
+            raise Exception("Invalid AP: [{}]".format(label))
+        if not ap_match['neg']:   # positive AP
+            if symb is not None:   # if other AP was positive
+                raise Exception("More than one positive AP: [{}]".format(
+                                label))
+            symb = aps[int(ap_match['ap'])]
+    return symb
+
+
+###########################################
+def parseHOA(fd, compact=False):
+    """parseHOA(fd, compact) -> dict() or Automaton
+
+Parses (the first automaton of) Hanoi Omega Automata format into a simple
+dictionary (see parseBA()) or, if 'compact' is set, into an Automaton.  The
+symbols are names of atomic propositions: every label needs to be a
+conjunction of literals with at most one positive atomic proposition (which
+is the symbol; there is no symbol, i.e., None, if there is none).  (Supports
+only state-based acceptance Buchi automata; see iterHOA() for the general
+case.)
+"""
+    aut = next(iterHOA(fd), None)
+    if aut is None:
+        raise Exception("Missing body!")
+
+    # input sanity checks
+    for name in aut.header.get("acc-name", []):
+        if name != ["Buchi"]:
+            raise Exception("Not Buchi acceptance: {}".format(" ".join(name)))
+    if aut.acc_sets != 1 or aut.acceptance != "Inf(0)":
+        raise Exception("Expected acceptance: \"1 Inf(0)\" Received: \"{} {}\"".format(aut.acc_sets, aut.acceptance))
+    if aut.trans_marks:
+        raise Exception("Transition-based acceptance is not supported")
+    if aut.univ_targets or any(len(conj) > 1 for conj in aut.start):
+        raise Exception("Universal branching is not supported")
+
+    # labels -> names of atomic propositions
+    aps = tuple(aut.aps)
+    symbols = [hoa_label_to_symbol(label, aps) for label in aut.symbol_names]
+    if not compact:
+        # the dictionary form needs only the names of the symbols
+        aut.symbol_names = symbols
+        return aut.to_dict()
+    aut.symbol_names = []
+    aut.symbol_ids = dict()
+    transl = [aut.add_symbol(symb) for symb in symbols]
+    if transl != list(range(len(transl))):   # some labels are one symbol
+        aut.trans_symb = array('i', [transl[symb]
+                                     for symb in aut.trans_symb])
 
     return aut
 
@@ -144,18 +718,20 @@ Parses Hanoi Omega Automata format into a simple dictionary.
 def aut2BA(aut):
     """aut2BA(aut) -> string
 
-Serializes an automaton as Rabit's BA file.
+Serializes an automaton (an Automaton or in the dictionary form) as Rabit's BA
+file.
 """
-    res = ""
-    for st in aut["initial"]:
-        res += st + "\n"
-    for trans in aut["transitions"]:
-        src, symb, tgt = trans
-        res += "{},{}->{}".format(symb, src, tgt) + "\n"
-    for st in aut["final"]:
-        res += st + "\n"
+    aut = as_automaton(aut)
+    names = aut.state_names
+    res = []
+    for st in aut.initial:
+        res.append(names[st] + "\n")
+    for (src, symb, tgt) in aut.transitions():
+        res.append("{},{}->{}\n".format(symb, src, tgt))
+    for st in aut.final:
+        res.append(names[st] + "\n")
 
-    return res
+    return "".join(res)
 
 
 ###########################################
@@ -258,53 +834,43 @@ Returns a pair (list of APs, dict of input symbol -> output symbol)
 
 
 ###########################################
-def aut2HOA(aut, encoding="BINARY_NONEXHAUSTIVE"):
-    """aut2HOA(aut, encoding) -> string
-
-Serializes an automaton as the Hanoi Omega Automata file format using the
-selected encoding of explicit alphabet into combinations of atomic propositions.
-
-Possible values of encoding:
-    * "ONE_HOT": every symbol is an atomic proposition
-    * "BINARY_NONEXHAUSTIVE": binary encoding into log2(number_of_symbols)
-        atomic propositions (there might still be some unused Boolean
-        combination of atomic propositions if number_of_symbols is not a power
-        of 2
-    * "BINARY_EXHAUSTIVE": similar to "BINARY_NONEXHAUSTIVE" but all Boolean
-        combinations of atomic propositions are used (by mapping one symbol of
-        the input alphabet to several combinations)
+def writeHOA(aut, fd, encoding="BINARY_NONEXHAUSTIVE"):
+    """writeHOA(aut, fd, encoding) -> None
+
+Writes an automaton (an Automaton or in the dictionary form) into the file
+object 'fd' in the Hanoi Omega Automata file format using the selected
+encoding of explicit alphabet into combinations of atomic propositions (see
+aut2HOA()).  The output is written incrementally (in chunks of
+HOA_CHUNK_LINES lines) and the time is linear in the size of the automaton.
+
+States are numbered in the order of their first occurrence among the initial
+states, the sources and targets of transitions (in their order) and the final
+states; the transitions of every state are written in their order.
 """
-    state_cnt = 0
-    state_transl_dict = dict()
-
-    ###########################################
-    def state_transl(state):
-        """state_transl(state) -> int
-
-    Translates state names into numbers.
-    """
-        nonlocal state_cnt
-        nonlocal state_transl_dict
-
-        if state not in state_transl_dict.keys():
-            state_transl_dict[state] = state_cnt
-            state_cnt += 1
-
-        return str(state_transl_dict[state])
-    ###########################################
-
+    aut = as_automaton(aut)
+    names = aut.state_names
+
+    # the numbers of states in the output (in the order of first occurrence)
+    hoa_num = array('i', [-1]) * aut.num_states()
+    order = array('i')    # output number -> state
+
+    def number(state):
+        if hoa_num[state] < 0:
+            hoa_num[state] = len(order)
+            order.append(state)
+
+    for st in aut.initial:
+        number(st)
+    for (src, tgt) in zip(aut.trans_src, aut.trans_tgt):
+        number(src)
+        number(tgt)
+    for st in aut.final:
+        number(st)
+
+    # the same set (built in the same order) as the symbols of transitions
     symb_set = set()
-
-    # count states and transitions
-    for st in aut["initial"]:
-        state_transl(st)
-    for trans in aut["transitions"]:
-        src, symb, tgt = trans
-        state_transl(src)
+    for symb in aut.symbol_names:
         symb_set.add(symb)
-        state_transl(tgt)
-    for st in aut["final"]:
-        state_transl(st)
 
     if encoding == "ONE_HOT":
         ap_list, symb_transl_dict = get_ap_alphabet_one_hot(symb_set)
@@ -314,139 +880,266 @@ Possible values of encoding:
         ap_list, symb_transl_dict = get_ap_alphabet_binary_exhaust(symb_set)
     else:
         raise Exception("Invalid value of 'encoding'")
+    labels = [symb_transl_dict[symb] for symb in aut.symbol_names]
 
-    ###########################################
-    def symb_transl(symb):
-        """symb_transl(symb) -> int
+    res = []
+    res.append("HOA: v1\n")
+    res.append("States: {}\n".format(len(order)))
 
-    Translates symbol names into numbers.
-    """
-        nonlocal symb_transl_dict
+    res.append("Start: ")
+    for st in aut.initial:
+        res.append(str(hoa_num[st]) + " ")
+    res.append("\n")
 
-        if symb not in symb_transl_dict.keys():
-            assert False
+    # magic setting for Buchi condition
+    res.append("acc-name: Buchi\n")
+    res.append("Acceptance: 1 Inf(0)\n")
+    res.append("properties: explicit-labels state-acc trans-labels\n")
 
-        return str(symb_transl_dict[symb])
-    ###########################################
+    # atomic propositions
+    res.append("AP: {}".format(len(ap_list)))
+    for ap in ap_list:
+        res.append(f" \"{ap}\"")
+    res.append("\n")
 
-    res = ""
-    res += "HOA: v1\n"
-    res += "States: {}\n".format(state_cnt)
+    res.append("--BODY--\n")
+    trans_symb, trans_tgt = aut.trans_symb, aut.trans_tgt
+    for (num, state) in enumerate(order):
+        if aut.is_final(state):
+            res.append(f"State: {num} \"{names[state]}\" {{ 0 }}\n")
+        else:
+            res.append(f"State: {num} \"{names[state]}\"\n")
+        for i in aut.out_transitions(state):
+            res.append(f"  {labels[trans_symb[i]]} {hoa_num[trans_tgt[i]]}\n")
 
-    res += "Start: "
-    for state in aut["initial"]:
-        res += state_transl(state) + " "
-    res += "\n"
+        if len(res) >= HOA_CHUNK_LINES:
+            fd.write("".join(res))
+            res = []
+    res.append("--END--\n")
 
-    # magic setting for Buchi condition
-    res += "acc-name: Buchi\n"
-    res += "Acceptance: 1 Inf(0)\n"
-    res += "properties: explicit-labels state-acc trans-labels\n"
+    fd.write("".join(res))
 
-    # atomic propositions
-    # res += "AP: {}".format(symb_cnt)
-    res += "AP: {}".format(len(ap_list))
-    for ap in ap_list:
-        res += f" \"{ap}\""
-    res += "\n"
-
-    res += "--BODY--\n"
-    for (name, num) in state_transl_dict.items():
-        res += f"State: {num} \"{name}\""
-        if name in aut["final"]:
-            res += " { 0 }"
-        res += "\n"
-
-        for trans in aut["transitions"]:
-            src, symb, tgt = trans
-            if src == name:
-                # res += "  ["
-                # for i in range(symb_cnt):
-                #     if i != 0:
-                #         res += " & "
-                #     if symb_transl_dict[symb] != i:
-                #         res += "!"
-                #     res += str(i)
-                res += f"  {symb_transl_dict[symb]} {state_transl(tgt)}\n"
-    res += "--END--\n"
 
-    return res
+###########################################
+def aut2HOA(aut, encoding="BINARY_NONEXHAUSTIVE"):
+    """aut2HOA(aut, encoding) -> string
+
+Serializes an automaton (an Automaton or in the dictionary form) as the Hanoi
+Omega Automata file format using the selected encoding of explicit alphabet
+into combinations of atomic propositions (see writeHOA()).
+
+Possible values of encoding:
+    * "ONE_HOT": every symbol is an atomic proposition
+    * "BINARY_NONEXHAUSTIVE": binary encoding into log2(number_of_symbols)
+        atomic propositions (there might still be some unused Boolean
+        combination of atomic propositions if number_of_symbols is not a power
+        of 2
+    * "BINARY_EXHAUSTIVE": similar to "BINARY_NONEXHAUSTIVE" but all Boolean
+        combinations of atomic propositions are used (by mapping one symbol of
+        the input alphabet to several combinations)
+"""
+    res = io.StringIO()
+    writeHOA(aut, res, encoding)
+    return res.getvalue()
 
 
 ###########################################
 def aut2GFF(aut):
     """aut2GFF(aut) -> string
 
-Serializes an automaton as the GOAL file format.
+Serializes an automaton (an Automaton or in the dictionary form) as the GOAL
+file format.  States are identified by their numbers in the Automaton.
+"""
+    aut = as_automaton(aut)
+
+    res = []
+    res.append("<?xml version=\"1.0\" encoding=\"UTF-8\" standalone=\"no\"?>\n")
+    res.append("<structure label-on=\"transition\" type=\"fa\">\n")
+
+    # the alphabet (only symbols of transitions)
+    used = bytearray(len(aut.symbol_names))
+    for symb in aut.trans_symb:
+        used[symb] = 1
+    res.append("<alphabet type=\"classical\">\n")
+    for (symb, name) in enumerate(aut.symbol_names):
+        if used[symb]:
+            res.append("<symbol>" + str(name) + "</symbol>\n")
+    res.append("</alphabet>\n")
+
+    res.append("<stateset>\n")
+    for st in range(aut.num_states()):
+        res.append("<state sid=\"" + str(st) + "\"></state>\n")
+    res.append("</stateset>\n")
+
+    res.append("<acc type=\"buchi\">\n")
+    for st in aut.final:
+        res.append("<stateID>" + str(st) + "</stateID>\n")
+    res.append("</acc>\n")
+
+    res.append("<initialStateSet>\n")
+    for st in aut.initial:
+        res.append("<stateID>" + str(st) + "</stateID>\n")
+    res.append("</initialStateSet>\n")
+
+    res.append("<transitionset>\n")
+    for (tid, (src, symb, tgt)) in enumerate(zip(aut.trans_src, aut.trans_symb,
+                                                 aut.trans_tgt)):
+        res.append("<transition tid=\"" + str(tid) + "\">\n")
+        res.append("<from>" + str(src) + "</from>\n" +
+                   "<to>" + str(tgt) + "</to>\n" +
+                   "<read>" + str(aut.symbol_names[symb]) + "</read>\n")
+        res.append("</transition>\n")
+    res.append("</transitionset>\n")
+
+    res.append("</structure>\n")
+
+    return "".join(res)
+
+
+###########################################
+def check_member_name(name):
+    """check_member_name(name) -> None
+
+Raises an exception if 'name' is not a valid name of a member of an archive:
+a relative path without empty, "." and ".." components (members are unpacked
+into files under a directory).
 """
-    state_cnt = 0
-    state_transl_dict = dict()
+    parts = name.replace(os.sep, "/").split("/")
+    if os.path.isabs(name) or any(part in ("", ".", "..") for part in parts):
+        raise Exception("Invalid member name: {}".format(name))
 
-    ###########################################
-    def state_transl(state):
-        """state_transl(state) -> int
 
-    Translates state names into numbers.
-    """
-        nonlocal state_cnt
-        nonlocal state_transl_dict
+###########################################
+def writeArchive(path, members):
+    """writeArchive(path, members) -> int
+
+Writes an archive of automata into the file 'path' and returns the number of
+its members.  'members' is an iterable of pairs (name, contents as bytes).
+The archive consists of the magic number, the contents of the members one
+after another, the index (the offset, the length and the name of every
+member) and a trailer pointing to the index.  The file is written atomically.
+Names of members need to be relative paths (see check_member_name()).
+"""
+    index = []
+    names = set()
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    try:
+        with open(tmp_path, 'wb') as fd:
+            fd.write(ARCHIVE_MAGIC)
+            offset = len(ARCHIVE_MAGIC)
+            for (name, data) in members:
+                check_member_name(name)
+                if name in names:
+                    raise Exception("Duplicate member: {}".format(name))
+                names.add(name)
+                fd.write(data)
+                index.append((name, offset, len(data)))
+                offset += len(data)
+
+            entries = []
+            for (name, member_offset, length) in index:
+                name = name.encode()
+                entries.append(ARCHIVE_ENTRY.pack(member_offset, length,
+                                                  len(name)))
+                entries.append(name)
+            fd.write(b"".join(entries))
+            fd.write(ARCHIVE_TRAILER.pack(offset, len(index)))
+            fd.write(ARCHIVE_MAGIC)
+    except BaseException:
+        os.remove(tmp_path)   # e.g., an invalid name of a member
+        raise
+    os.replace(tmp_path, path)
+    return len(index)
 
-        if state not in state_transl_dict.keys():
-            state_transl_dict[state] = state_cnt
-            state_cnt += 1
 
-        return str(state_transl_dict[state])
-    ###########################################
+###########################################
+class AutomataArchive:
+    """AutomataArchive: a reader of archives of automata (see writeArchive()).
 
-    res = ""
-    res += "<?xml version=\"1.0\" encoding=\"UTF-8\" standalone=\"no\"?>\n"
-    res += "<structure label-on=\"transition\" type=\"fa\">\n"
-
-    # get the alphabet
-    alphabet = set()
-    states = set()
-    for trans in aut["transitions"]:
-        src, symb, tgt = trans
-        alphabet.add(symb)
-        states.add(src)
-        states.add(tgt)
-    for st in aut["initial"]:
-        states.add(st)
-    for st in aut["final"]:
-        states.add(st)
-
-    res += "<alphabet type=\"classical\">\n"
-    for symb in alphabet:
-        res += "<symbol>" + symb + "</symbol>\n"
-    res += "</alphabet>\n"
-
-    res += "<stateset>\n"
-    for st in states:
-        res += "<state sid=\"" + state_transl(st) +  "\"></state>\n";
-    res += "</stateset>\n"
-
-    res += "<acc type=\"buchi\">\n"
-    for st in aut["final"]:
-        res += "<stateID>" + state_transl(st) +  "</stateID>\n"
-    res += "</acc>\n"
-
-    res += "<initialStateSet>\n"
-    for st in aut["initial"]:
-        res += "<stateID>" + state_transl(st) + "</stateID>\n"
-    res += "</initialStateSet>\n";
-
-    res += "<transitionset>\n"
-    tid = 0
-    for trans in aut["transitions"]:
-        src, symb, tgt = trans
-        res += "<transition tid=\"" + str(tid) + "\">\n"
-        tid += 1
-        res += "<from>" + state_transl(src) + "</from>\n" +\
-               "<to>" + state_transl(tgt) + "</to>\n" + \
-               "<read>" + symb + "</read>\n"
-        res += "</transition>\n"
-    res += "</transitionset>\n"
-
-    res += "</structure>\n"
+The archive is memory-mapped, only its index is read when it is opened;
+members are read (and parsed) when they are asked for.
+"""
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as fd:
+            self.mmap = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+
+        size = len(self.mmap)
+        trailer_size = ARCHIVE_TRAILER.size + len(ARCHIVE_MAGIC)
+        if size < len(ARCHIVE_MAGIC) + trailer_size or \
+                self.mmap[:len(ARCHIVE_MAGIC)] != ARCHIVE_MAGIC or \
+                self.mmap[-len(ARCHIVE_MAGIC):] != ARCHIVE_MAGIC:
+            self.mmap.close()
+            raise Exception("Not an archive of automata: {}".format(path))
+        index_offset, count = ARCHIVE_TRAILER.unpack_from(
+            self.mmap, size - trailer_size)
+
+        self.members = dict()   # name -> (offset, length)
+        pos = index_offset
+        for _ in range(count):
+            offset, length, name_len = ARCHIVE_ENTRY.unpack_from(self.mmap,
+                                                                 pos)
+            pos += ARCHIVE_ENTRY.size
+            name = self.mmap[pos:pos + name_len].decode()
+            pos += name_len
+            self.members[name] = (offset, length)
+
+    def close(self):
+        """close() -> None"""
+        self.mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self.members)
+
+    def __contains__(self, name):
+        return name in self.members
+
+    def __iter__(self):
+        return iter(self.members)
+
+    def names(self):
+        """names() -> list
+
+Returns the names of the members (in the order they were written).
+"""
+        return list(self.members)
 
-    return res
+    def size(self, name):
+        """size(name) -> int"""
+        return self.members[name][1]
+
+    def read(self, name):
+        """read(name) -> bytes
+
+Returns the contents of the member 'name'.
+"""
+        if name not in self.members:
+            raise Exception("No member {} in {}".format(name, self.path))
+        offset, length = self.members[name]
+        return self.mmap[offset:offset + length]
+
+    def parse(self, name, compact=True):
+        """parse(name, compact) -> Automaton or dict()
+
+Parses the member 'name' by parseHOA() or parseBA() (given by its suffix).
+"""
+        fd = io.StringIO(self.read(name).decode())
+        if name.endswith(".hoa"):
+            return parseHOA(fd, compact)
+        elif name.endswith(".ba"):
+            return parseBA(fd, compact)
+        raise Exception("Unknown format of {}".format(name))
+
+    def automata(self, names=None, compact=True):
+        """automata(names, compact) -> generator of (str, Automaton)
+
+Lazily yields the members 'names' (all members by default) parsed by parse().
+"""
+        for name in self.members if names is None else names:
+            yield (name, self.parse(name, compact))
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# A script for bulk translation of automata between the formats supported by
+# buchi_conv_common (BA, HOA, GFF).  The input is a directory (walked
+# recursively) or an .input file with a list of automata; the outputs are
+# written into a parallel directory tree.  Conversions run in a pool of
+# processes and are incremental: a manifest in the output directory records
+# the mtime and the hash of every converted source, so only new or changed
+# sources are converted again (or all of them when the conversion or
+# buchi_conv_common changes).
+
+import argparse
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import buchi_conv_common as BA
+
+# conversion -> (suffix of sources, suffix of outputs)
+CONVERSIONS = {"ba2hoa": (".ba", ".hoa"),
+               "ba2gff": (".ba", ".gff"),
+               "hoa2ba": (".hoa", ".ba"),
+              }
+
+ENCODING_CHOICES = {"binary": "BINARY_NONEXHAUSTIVE",
+                    "binary_exhaust": "BINARY_EXHAUSTIVE",
+                    "one_hot": "ONE_HOT"
+                   }
+
+# the name of the manifest (in the output directory)
+MANIFEST_NAME = ".bulk_conv.json"
+
+# the number of files a worker of the pool gets at once
+CHUNK_SIZE = 32
+
+
+###########################################
+def hash_file(filename):
+    """hash_file(filename) -> str
+
+Returns the SHA-256 hash of the contents of a file.
+"""
+    h = hashlib.sha256()
+    with open(filename, 'rb') as fd:
+        for chunk in iter(lambda: fd.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+###########################################
+def conversion_key(conv, encoding):
+    """conversion_key(conv, encoding) -> str
+
+Returns a string identifying the conversion: its name, the encoding of
+alphabets (for HOA outputs) and the hash of buchi_conv_common (a change in the
+code invalidates all outputs).
+"""
+    key = conv
+    if CONVERSIONS[conv][1] == ".hoa":
+        key += ":" + encoding
+    return key + ":" + hash_file(BA.__file__)
+
+
+###########################################
+def list_sources(source, suffix):
+    """list_sources(source, suffix) -> (str, list)
+
+Returns the base directory of the sources and the list of paths of sources
+relative to it.  'source' is either a directory (walked recursively for files
+with 'suffix') or an .input file with a path on every line (the base directory
+is then their common directory).
+"""
+    if os.path.isdir(source):
+        files = list()
+        for root, dirs, names in os.walk(source):
+            dirs.sort()
+            for name in sorted(names):
+                if name.endswith(suffix):
+                    files.append(os.path.relpath(os.path.join(root, name),
+                                                 source))
+        return (source, files)
+
+    with open(source, 'r') as fd:
+        paths = [line.strip() for line in fd]
+    paths = [path for path in paths if path and not path.startswith('#')]
+    if not paths:
+        return (".", [])
+    base = os.path.commonpath([os.path.dirname(os.path.abspath(path))
+                               for path in paths])
+    return (base, [os.path.relpath(path, base) for path in paths])
+
+
+###########################################
+def output_path(rel, conv):
+    """output_path(rel, conv) -> str
+
+Returns the relative path of the output of the conversion 'conv' of the source
+with the relative path 'rel' (its suffix is replaced).
+"""
+    src_suffix, out_suffix = CONVERSIONS[conv]
+    if rel.endswith(src_suffix):
+        rel = rel[:-len(src_suffix)]
+    return rel + out_suffix
+
+
+###########################################
+def convert_text(text, conv, encoding):
+    """convert_text(text, conv, encoding) -> str
+
+Converts the automaton 'text' using the conversion 'conv'.
+"""
+    if conv == "hoa2ba":
+        return BA.aut2BA(BA.parseHOA(io.StringIO(text), compact=True))
+
+    aut = BA.parseBA(io.StringIO(text), compact=True)
+    if conv == "ba2gff":
+        return BA.aut2GFF(aut)
+    out = io.StringIO()
+    BA.writeHOA(aut, out, encoding)
+    return out.getvalue()
+
+
+###########################################
+def convert_file(job):
+    """convert_file(job) -> dict()
+
+Converts a single file (run in the pool).  'job' is a tuple (conversion,
+encoding, source, output, the hash of the source in the manifest).  The source
+is not converted if its hash equals the one in the manifest.
+"""
+    conv, encoding, src, out, old_hash = job
+    res = {"source": src}
+    try:
+        with open(src, 'rb') as fd:
+            data = fd.read()
+        res["mtime"] = os.stat(src).st_mtime_ns
+        res["hash"] = hashlib.sha256(data).hexdigest()
+        if res["hash"] == old_hash:
+            res["status"] = "unchanged"
+            return res
+
+        text = convert_text(data.decode(), conv, encoding)
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+        # write atomically so that an interrupted run leaves no partial output
+        tmp_path = '{}.{}.tmp'.format(out, os.getpid())
+        with open(tmp_path, 'w') as fd:
+            fd.write(text)
+        os.replace(tmp_path, out)
+        res["status"] = "converted"
+    except Exception as ex:
+        res["status"] = "failed"
+        res["error"] = str(ex)
+    return res
+
+
+###########################################
+def load_manifest(path, key):
+    """load_manifest(path, key) -> dict()
+
+Loads the manifest (source -> {"mtime", "hash"}) from 'path'.  Returns an empty
+one if there is none or it was created by another conversion than 'key'.
+"""
+    try:
+        with open(path, 'r') as fd:
+            manifest = json.load(fd)
+    except (OSError, ValueError):
+        return dict()
+    if manifest.get("conversion") != key:
+        return dict()
+    return manifest.get("files", dict())
+
+
+###########################################
+def save_manifest(path, key, files):
+    """save_manifest(path, key, files) -> None
+
+Writes the manifest atomically into 'path'.
+"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'w') as fd:
+        json.dump({"conversion": key, "files": files}, fd, indent=1,
+                  sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+###########################################
+def bulk_convert(args):
+    """bulk_convert(args) -> int
+
+Converts all sources given by the command line arguments 'args' and returns
+the number of failed conversions.
+"""
+    src_suffix, _ = CONVERSIONS[args.conversion]
+    encoding = ENCODING_CHOICES[args.encoding]
+    key = conversion_key(args.conversion, args.encoding)
+    manifest_path = args.manifest
+    if manifest_path is None:
+        manifest_path = os.path.join(args.output, MANIFEST_NAME)
+
+    base, sources = list_sources(args.source, src_suffix)
+    old_files = dict() if args.force else load_manifest(manifest_path, key)
+    files = dict()
+
+    # sources with the same mtime as in the manifest are skipped without
+    # reading them, others are hashed (and converted if their hash differs)
+    jobs = list()
+    rel_of = dict()     # source -> its relative path
+    skipped = 0
+    for rel in sources:
+        src = os.path.join(base, rel)
+        out = os.path.join(args.output, output_path(rel, args.conversion))
+        entry = old_files.get(rel)
+        if entry is not None and os.path.exists(out):
+            try:
+                mtime = os.stat(src).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime == entry["mtime"]:
+                files[rel] = entry
+                skipped += 1
+                continue
+            old_hash = entry["hash"]
+        else:
+            old_hash = None
+        jobs.append((args.conversion, encoding, src, out, old_hash))
+        rel_of[src] = rel
+
+    cnt = {"converted": 0, "unchanged": skipped, "failed": 0}
+    try:
+        with multiprocessing.Pool(args.jobs) as pool:
+            for res in pool.imap_unordered(convert_file, jobs,
+                                           chunksize=CHUNK_SIZE):
+                cnt[res["status"]] += 1
+                if res["status"] == "failed":
+                    sys.stderr.write("Error: {}: {}\n".format(res["source"],
+                                                              res["error"]))
+                    continue
+                files[rel_of[res["source"]]] = {"mtime": res["mtime"],
+                                                "hash": res["hash"]}
+    finally:
+        # keep what was done even if the run is interrupted
+        save_manifest(manifest_path, key, files)
+
+    print("converted: {}, unchanged: {}, failed: {}".format(
+        cnt["converted"], cnt["unchanged"], cnt["failed"]))
+    return cnt["failed"]
+
+
+###########################################
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+                description="converts a corpus of automata between formats "
+                            "(only new or changed automata are converted)")
+    parser.add_argument("conversion", choices=CONVERSIONS.keys(),
+                        help="the conversion")
+    parser.add_argument("source",
+                        help="a directory with automata (searched "
+                             "recursively) or an .input file with a list of "
+                             "automata")
+    parser.add_argument("output",
+                        help="the output directory (the directory structure "
+                             "of the sources is kept)")
+    parser.add_argument('-e', '--encoding', metavar='ENCODING', type=str,
+                        choices=ENCODING_CHOICES.keys(),
+                        default="binary",
+                        help=f"Which encoding to use (for HOA outputs). Options: {[str(enc) for enc in ENCODING_CHOICES.keys()]}")
+    parser.add_argument('-j', '--jobs', metavar='N', type=int,
+                        default=os.cpu_count(),
+                        help="the number of processes (default: the number "
+                             "of CPUs)")
+    parser.add_argument('--manifest', metavar='FILE',
+                        help="the manifest recording converted sources "
+                             "(default: {} in the output directory)".format(
+                             MANIFEST_NAME))
+    parser.add_argument('--force', action="store_true",
+                        help="convert all sources (ignore the manifest)")
+
+    args = parser.parse_args()
+
+    sys.exit(1 if bulk_convert(args) > 0 else 0)
@@ -17,7 +17,7 @@ if __name__ == '__main__':
         print("Invalid number of arguments: either 0 or 1 required")
         sys.exit(1)
 
-    aut = BA.parseHOA(fd)
+    aut = BA.parseHOA(fd, compact=True)
     res = BA.aut2BA(aut)
 
     print(res, end="")